@@ -1,20 +1,32 @@
 """
 Flask web server for NetworkX graph visualization.
-Run with: uv run app.py
+Run with: uv run app.py  (development; FLASK_DEBUG=1 enables the debugger)
+Production: gunicorn -w $(nproc) -k gthread -b 0.0.0.0:5000 app:app
 Visit: http://localhost:5000
 """
 
-import json
+import bisect
 import os
+import stat
+import threading
+import traceback
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from flask import Flask, jsonify, render_template, request
+import yaml
+from flask import Flask, Response, jsonify, request, send_from_directory
 from werkzeug.utils import secure_filename
 
+try:  # Prefer the libyaml-backed loader when PyYAML was built with it
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 # Import from the existing package
+from src.networkx_graph import jsonio
+from src.networkx_graph.graph_dirs import default_graph_dirs
 from src.networkx_graph.state_graph import StateGraph
-from src.networkx_graph.visualization import import_graph_json, import_graph_yaml
 
 app = Flask(
     __name__,
@@ -23,109 +35,251 @@ app = Flask(
     template_folder="web/static",
 )
 
-# Global graph registry (loaded graphs)
-loaded_graphs: Dict[str, StateGraph] = {}
+# Max number of parsed graph files kept in memory
+GRAPH_CACHE_SIZE = 32
+
+# Graph file listing per scan directory: dir -> (dir mtime_ns, entries)
+_file_index_cache: Dict[Path, Tuple[int, List[Dict[str, str]]]] = {}
+
+# Combined index: (scan-dir mtimes, files, name -> entry, sorted names)
+_graph_index: Optional[
+    Tuple[tuple, List[Dict[str, str]], Dict[str, Dict[str, str]], List[str]]
+] = None
 
 
 def find_graph_files() -> List[Dict[str, str]]:
     """Find all graph YAML/JSON files in common directories."""
-    graph_files = []
-    scan_dirs = [
-        Path.cwd() / "graphs",
-        Path("graphs"),
-        Path("/home/aaugus11/Documents/mcp-client-example/graphs"),
-    ]
+    return _graph_file_index()[0]
+
+
+def _scan_graph_dir(dir_path: Path) -> Tuple[int, List[Dict[str, str]]]:
+    """List graph files in a directory, re-globbing only when its mtime changes."""
+    try:
+        st = dir_path.stat()
+    except OSError:
+        return -1, []
+    if not stat.S_ISDIR(st.st_mode):
+        return -1, []
+
+    cached = _file_index_cache.get(dir_path)
+    if cached is not None and cached[0] == st.st_mtime_ns:
+        return cached
+
+    entries = []
+    for ext in ["*.yaml", "*.yml", "*.json"]:
+        for file_path in sorted(dir_path.glob(ext)):
+            entries.append(
+                {
+                    "path": str(file_path),
+                    "name": file_path.name,
+                    "format": "yaml" if ext.startswith("*.yam") else "json",
+                }
+            )
+
+    _file_index_cache[dir_path] = (st.st_mtime_ns, entries)
+    return st.st_mtime_ns, entries
 
-    for dir_path in scan_dirs:
-        if dir_path.exists() and dir_path.is_dir():
-            for ext in ["*.yaml", "*.yml", "*.json"]:
-                for file_path in sorted(dir_path.glob(ext)):
-                    graph_files.append(
-                        {
-                            "path": str(file_path),
-                            "name": file_path.name,
-                            "format": "yaml" if ext.startswith("*.yam") else "json",
-                        }
-                    )
 
-    return graph_files
+def _graph_file_index() -> Tuple[List[Dict[str, str]], Dict[str, Dict[str, str]], List[str]]:
+    """Return (files, name -> file entry, sorted names) across all scan directories."""
+    global _graph_index
+
+    scan_dirs = default_graph_dirs()
+    scans = [(dir_path, *_scan_graph_dir(dir_path)) for dir_path in scan_dirs]
+    key = tuple((dir_path, mtime_ns) for dir_path, mtime_ns, _ in scans)
+
+    if _graph_index is None or _graph_index[0] != key:
+        graph_files = [entry for _, _, entries in scans for entry in entries]
+        name_index: Dict[str, Dict[str, str]] = {}
+        for entry in graph_files:
+            name_index.setdefault(entry["name"], entry)
+        _graph_index = (key, graph_files, name_index, sorted(name_index))
+
+    return _graph_index[1], _graph_index[2], _graph_index[3]
+
+
+def _find_graph_file(graph_name: str) -> Optional[Dict[str, str]]:
+    """Resolve a graph name to its file entry (exact name first, then prefix).
+
+    Prefix matches resolve to the alphabetically first matching file name.
+    """
+    _, name_index, sorted_names = _graph_file_index()
+    entry = name_index.get(graph_name)
+    if entry is None:
+        i = bisect.bisect_left(sorted_names, graph_name)
+        if i < len(sorted_names) and sorted_names[i].startswith(graph_name):
+            entry = name_index[sorted_names[i]]
+    return entry
 
 
 def load_graph_from_file(file_path: str) -> StateGraph:
-    """Load a graph from YAML or JSON file."""
-    path = Path(file_path)
+    """Load a graph from YAML or JSON file (parsed once per on-disk version)."""
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Graph file not found: {file_path}") from None
+
+    return _parse_graph_file(file_path, st.st_mtime_ns, st.st_size)
 
-    if not path.exists():
-        raise FileNotFoundError(f"Graph file not found: {file_path}")
 
-    # Determine format
-    if path.suffix in [".yaml", ".yml"]:
-        data = import_graph_yaml(str(path))
-    elif path.suffix == ".json":
-        data = import_graph_json(str(path))
-    else:
+@lru_cache(maxsize=GRAPH_CACHE_SIZE)
+def _parse_graph_file(file_path: str, mtime_ns: int, size: int) -> StateGraph:
+    """Parse a graph file; keyed on (path, mtime_ns, size) so edits invalidate it."""
+    path = Path(file_path)
+
+    if path.suffix not in [".yaml", ".yml", ".json"]:
         raise ValueError(f"Unsupported file format: {path.suffix}")
 
+    data = _parse_graph_bytes(path.read_bytes())
     return _create_graph_from_data(data, path.stem)
 
 
 def load_graph_from_stream(file_stream, filename: str) -> StateGraph:
     """Load a graph directly from a file stream (no disk save needed)."""
-    import yaml
-    import json
-
-    # Determine format from filename
-    if filename.lower().endswith((".yaml", ".yml")):
-        data = yaml.safe_load(file_stream)
-    elif filename.lower().endswith(".json"):
-        data = json.load(file_stream)
-    else:
+    if not filename.lower().endswith((".yaml", ".yml", ".json")):
         raise ValueError(f"Unsupported file format: {filename}")
 
+    # Uploads are small; one read lets the parsers work on in-memory bytes
+    data = _parse_graph_bytes(file_stream.read())
     return _create_graph_from_data(data, Path(filename).stem)
 
 
+def _looks_like_json(head: bytes) -> bool:
+    """Return True if a document starts like a JSON object or array."""
+    return head.lstrip()[:1] in (b"{", b"[")
+
+
+def _parse_graph_bytes(buf: bytes) -> Dict[str, Any]:
+    """Parse a YAML or JSON graph document.
+
+    JSON is a subset of YAML, so JSON-looking content goes through the much
+    faster JSON parser first; YAML flow mappings (``{a: 1}``) fall back to YAML.
+    """
+    if _looks_like_json(buf[:16]):
+        try:
+            return jsonio.loads(buf)
+        except jsonio.JSONDecodeError:
+            pass
+
+    return yaml.load(buf, Loader=SafeLoader)
+
+
+def _warm_cache() -> None:
+    """Parse every known graph file up front so first requests hit the cache."""
+    for graph_file in find_graph_files():
+        try:
+            load_graph_from_file(graph_file["path"])
+        except Exception as e:
+            print(f"Skipping {graph_file['path']} during cache warm-up: {e}")
+
+
+# Caches are per process, so each server process (gunicorn worker) warms its own
+_warm_cache_lock = threading.Lock()
+_warm_cache_started = False
+
+
+@app.before_request
+def _start_warm_cache() -> None:
+    """Start the background cache warm-up once per process.
+
+    Runs before the first request as well as at dev-server launch, so it also
+    happens under gunicorn, where the __main__ block never executes.
+    """
+    global _warm_cache_started
+    if _warm_cache_started:
+        return
+    with _warm_cache_lock:
+        if _warm_cache_started:
+            return
+        _warm_cache_started = True
+    threading.Thread(target=_warm_cache, name="graph-cache-warmup", daemon=True).start()
+
+
 def _create_graph_from_data(data: Dict[str, Any], default_graph_id: str) -> StateGraph:
     """Create a StateGraph from parsed data."""
-    # Create graph and populate
-    graph_id = data.get("graph_id", default_graph_id)
-    g = StateGraph(graph_id)
-
-    # Add nodes
-    for node_id, node_data in data.get("nodes", {}).items():
-        g.add_node(
-            node_id=node_id,
-            node_type=node_data.get("node_type") or node_data.get("type", "action"),
-            label=node_data.get("label") or node_data.get("name"),
-            phase=node_data.get("phase"),
-            tool=node_data.get("tool"),
-            properties=node_data.get("properties"),
-        )
+    return StateGraph.from_dict(data.get("graph_id", default_graph_id), data)
 
-    # Add edges
-    for edge in data.get("edges", []):
-        g.add_edge(
-            from_node=edge.get("from") or edge.get("parent"),
-            to_node=edge.get("to") or edge.get("child"),
-            order=edge.get("order", 0),
-            condition=edge.get("condition"),
-            properties=edge.get("properties"),
-        )
 
-    return g
+def _edge_list(edge_view: Any, nbunch: Any = None) -> List[Dict[str, Any]]:
+    """Project edges from an edge view (edges/in_edges/out_edges) to the visualization format.
+
+    Walks the view once per attribute so NetworkX resolves order/condition
+    itself; both walks see the same edge order.
+    """
+    orders = edge_view(nbunch, data="order", default=0)
+    conditions = edge_view(nbunch, data="condition")
+    return [
+        {"from": u, "to": v, "order": order, "condition": condition}
+        for (u, v, order), (_, _, condition) in zip(orders, conditions)
+    ]
+
+
+def _graph_payload(g: StateGraph) -> Dict[str, Any]:
+    """Convert a graph to the visualization format (nodes, edges, stats).
+
+    Not cached: uploads build a fresh graph each time. File-backed graphs are
+    served through the cached _serialize_graph instead.
+    """
+    nodes = [
+        {
+            "id": node_id,
+            "label": node_data.get("label", node_id),
+            "type": node_data.get("node_type", "action"),
+            "phase": node_data.get("phase"),
+            "tool": node_data.get("tool"),
+            "properties": node_data.get("properties", {}),
+        }
+        for node_id, node_data in g.graph.nodes(data=True)
+    ]
+
+    edges = _edge_list(g.graph.edges)
+
+    stats = g.get_graph_info()
+
+    return {
+        "graph_id": g.graph_id,
+        "nodes": nodes,
+        "edges": edges,
+        "stats": {
+            "total_nodes": stats["num_nodes"],
+            "total_edges": stats["num_edges"],
+            "node_types": stats["node_types"],
+            "phases": stats["phases"],
+            "decision_points": stats["decision_points"],
+            "loops": stats["loops"],
+        },
+    }
+
+
+def _json_response(obj: Any) -> Response:
+    """Build a JSON response (orjson-encoded when available)."""
+    return Response(jsonio.dumps(obj), mimetype="application/json")
+
+
+@lru_cache(maxsize=GRAPH_CACHE_SIZE)
+def _serialize_graph(g: StateGraph) -> bytes:
+    """Encode a file-backed graph's visualization payload once.
+
+    An edited file is re-parsed into a new StateGraph, so keying on the graph
+    object is enough. Uploaded graphs are never passed here; they would take
+    cache slots that can't be hit again.
+    """
+    return jsonio.dumps(_graph_payload(g))
 
 
 @app.route("/")
 def index():
-    """Serve main visualization page."""
-    return render_template("index.html")
+    """Serve main visualization page (static shell, no templating needed)."""
+    resp = send_from_directory(app.static_folder, "index.html", max_age=3600)
+    resp.cache_control.public = True
+    return resp
 
 
 @app.route("/api/graphs")
 def list_graphs():
     """List all available graph files."""
     files = find_graph_files()
-    return jsonify({"graphs": files})
+    return _json_response({"graphs": files})
 
 
 @app.route("/api/load-file", methods=["POST"])
@@ -150,57 +304,9 @@ def load_file():
         g = load_graph_from_stream(file.stream, filename)
         print(f"Successfully loaded graph: {g.graph_id} with {g.graph.number_of_nodes()} nodes")
 
-        # Store in loaded graphs with a unique key
-        graph_key = f"uploaded_{filename}"
-        loaded_graphs[graph_key] = g
-
-        # Convert to visualization format
-        nodes = []
-        for node_id in g.graph.nodes():
-            node_data = g.graph.nodes[node_id]
-            nodes.append(
-                {
-                    "id": node_id,
-                    "label": node_data.get("label", node_id),
-                    "type": node_data.get("node_type", "action"),
-                    "phase": node_data.get("phase"),
-                    "tool": node_data.get("tool"),
-                    "properties": node_data.get("properties", {}),
-                }
-            )
-
-        edges = []
-        for from_node, to_node, attrs in g.graph.edges(data=True):
-            edges.append(
-                {
-                    "from": from_node,
-                    "to": to_node,
-                    "order": attrs.get("order", 0),
-                    "condition": attrs.get("condition"),
-                }
-            )
-
-        stats = g.get_graph_info()
-
-        return jsonify(
-            {
-                "graph_id": g.graph_id,
-                "filename": filename,
-                "nodes": nodes,
-                "edges": edges,
-                "stats": {
-                    "total_nodes": stats["num_nodes"],
-                    "total_edges": stats["num_edges"],
-                    "node_types": stats["node_types"],
-                    "phases": stats["phases"],
-                    "decision_points": stats["decision_points"],
-                    "loops": stats["loops"],
-                },
-            }
-        )
+        return _json_response({**_graph_payload(g), "filename": filename})
 
     except Exception as e:
-        import traceback
         error_msg = str(e)
         print(f"Error loading file: {error_msg}")
         print(traceback.format_exc())
@@ -211,66 +317,24 @@ def load_file():
 def get_graph(graph_name: str):
     """Load and return graph data for visualization."""
     try:
-        # Find the graph file
-        files = find_graph_files()
-        graph_file = None
-        for f in files:
-            if f["name"] == graph_name or f["name"].startswith(graph_name):
-                graph_file = f
-                break
+        graph_file = _find_graph_file(graph_name)
 
         if not graph_file:
             return jsonify({"error": f"Graph '{graph_name}' not found"}), 404
 
-        # Load graph if not already loaded
-        if graph_file["path"] not in loaded_graphs:
-            loaded_graphs[graph_file["path"]] = load_graph_from_file(graph_file["path"])
+        # The payload only changes when the file does, so let clients revalidate
+        st = os.stat(graph_file["path"])
+        etag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+        if request.if_none_match.contains(etag):
+            resp = Response(status=304)
+        else:
+            g = load_graph_from_file(graph_file["path"])
+            resp = Response(_serialize_graph(g), mimetype="application/json")
 
-        g = loaded_graphs[graph_file["path"]]
-
-        # Convert to visualization format
-        nodes = []
-        for node_id in g.graph.nodes():
-            node_data = g.graph.nodes[node_id]
-            nodes.append(
-                {
-                    "id": node_id,
-                    "label": node_data.get("label", node_id),
-                    "type": node_data.get("node_type", "action"),
-                    "phase": node_data.get("phase"),
-                    "tool": node_data.get("tool"),
-                    "properties": node_data.get("properties", {}),
-                }
-            )
-
-        edges = []
-        for from_node, to_node, attrs in g.graph.edges(data=True):
-            edges.append(
-                {
-                    "from": from_node,
-                    "to": to_node,
-                    "order": attrs.get("order", 0),
-                    "condition": attrs.get("condition"),
-                }
-            )
-
-        stats = g.get_graph_info()
-
-        return jsonify(
-            {
-                "graph_id": g.graph_id,
-                "nodes": nodes,
-                "edges": edges,
-                "stats": {
-                    "total_nodes": stats["num_nodes"],
-                    "total_edges": stats["num_edges"],
-                    "node_types": stats["node_types"],
-                    "phases": stats["phases"],
-                    "decision_points": stats["decision_points"],
-                    "loops": stats["loops"],
-                },
-            }
-        )
+        resp.set_etag(etag)
+        resp.cache_control.max_age = 0
+        resp.cache_control.must_revalidate = True
+        return resp
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -280,51 +344,24 @@ def get_graph(graph_name: str):
 def get_node(graph_name: str, node_id: str):
     """Get specific node details."""
     try:
-        files = find_graph_files()
-        graph_file = None
-        for f in files:
-            if f["name"] == graph_name or f["name"].startswith(graph_name):
-                graph_file = f
-                break
+        graph_file = _find_graph_file(graph_name)
 
         if not graph_file:
             return jsonify({"error": "Graph not found"}), 404
 
-        if graph_file["path"] not in loaded_graphs:
-            loaded_graphs[graph_file["path"]] = load_graph_from_file(graph_file["path"])
+        g = load_graph_from_file(graph_file["path"])
 
-        g = loaded_graphs[graph_file["path"]]
-
-        if node_id not in g.graph.nodes():
+        node_attrs = g.graph.nodes.get(node_id)
+        if node_attrs is None:
             return jsonify({"error": "Node not found"}), 404
 
-        node_data = dict(g.graph.nodes[node_id])
-        node_data["node_id"] = node_id
+        node_data = {**node_attrs, "node_id": node_id}
 
         # Get edges
-        incoming = []
-        for from_n, to_n, attrs in g.graph.in_edges(node_id, data=True):
-            incoming.append(
-                {
-                    "from": from_n,
-                    "to": to_n,
-                    "order": attrs.get("order", 0),
-                    "condition": attrs.get("condition"),
-                }
-            )
-
-        outgoing = []
-        for from_n, to_n, attrs in g.graph.out_edges(node_id, data=True):
-            outgoing.append(
-                {
-                    "from": from_n,
-                    "to": to_n,
-                    "order": attrs.get("order", 0),
-                    "condition": attrs.get("condition"),
-                }
-            )
+        incoming = _edge_list(g.graph.in_edges, node_id)
+        outgoing = _edge_list(g.graph.out_edges, node_id)
 
-        return jsonify(
+        return _json_response(
             {
                 "node": node_data,
                 "incoming": incoming,
@@ -340,12 +377,19 @@ if __name__ == "__main__":
     print("\n" + "=" * 60)
     print("🌐 NETWORKX GRAPH VISUALIZATION SERVER")
     print("=" * 60)
-    print("\n✓ Starting Flask server...")
+    # Development server only; set FLASK_DEBUG=1 for the interactive debugger.
+    # For production use a WSGI server, e.g.:
+    #   gunicorn -w $(nproc) -k gthread -b 0.0.0.0:5000 app:app
+    debug = os.environ.get("FLASK_DEBUG", "") in ("1", "true", "True")
+
+    print("\n✓ Starting Flask development server" + (" (debug)" if debug else "") + "...")
     print("✓ Open your browser to: http://localhost:5000")
     print("✓ Press Ctrl+C to stop\n")
 
+    _start_warm_cache()
+
     try:
-        app.run(debug=True, host="0.0.0.0", port=5000, use_reloader=False)
+        app.run(debug=debug, host="0.0.0.0", port=5000, use_reloader=False, threaded=True)
     except KeyboardInterrupt:
         print("\n\nServer stopped.")
 
@@ -0,0 +1,27 @@
+"""Default graph file directories, shared by the MCP server and the web app."""
+
+import functools
+import os
+from pathlib import Path
+from typing import Tuple
+
+# Environment variable naming an extra graph directory
+GRAPHS_DIR_ENV = "MCP_GRAPHS_DIR"
+
+
+def default_graph_dirs() -> Tuple[Path, ...]:
+    """Directories searched for graph files, highest precedence first.
+
+    ./graphs (relative to the current working directory) comes first, then
+    $MCP_GRAPHS_DIR if set, so a project-local file shadows a shared one of
+    the same name. Entries are resolved and duplicates dropped.
+    """
+    return _resolve_graph_dirs(os.getcwd(), os.environ.get(GRAPHS_DIR_ENV, ""))
+
+
+@functools.lru_cache(maxsize=8)
+def _resolve_graph_dirs(cwd: str, env_dir: str) -> Tuple[Path, ...]:
+    candidates = [Path(cwd) / "graphs"]
+    if env_dir:
+        candidates.append(Path(env_dir).expanduser())
+    return tuple(dict.fromkeys(p.resolve() for p in candidates))
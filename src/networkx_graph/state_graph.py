@@ -1,330 +1,280 @@
 """State-transition graph management using NetworkX."""
 
+import functools
+import sys
 import threading
-from typing import Any, Dict, List, Optional
+from collections import Counter, OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 import networkx as nx
 
+# Allowed node types, in the order they are advertised in tool schemas
+NODE_TYPES = ("action", "decision", "verification", "loop", "success", "failure")
 
-class StateGraph:
-    """State-transition graph manager using NetworkX DiGraph (cycles allowed)."""
-
-    def __init__(self, graph_id: str) -> None:
-        self.graph_id = graph_id
-        self.graph = nx.DiGraph()
-        self._lock = threading.RLock()  # Thread-safe operations
-
-    def create_graph(self) -> Dict[str, Any]:
-        """Create a new empty graph."""
-        with self._lock:
-            return {
-                "graph_id": self.graph_id,
-                "status": "created",
-                "num_nodes": 0,
-                "num_edges": 0,
-            }
-
-    def add_node(
-        self,
-        node_id: str,
-        node_type: str,
-        label: Optional[str] = None,
-        phase: Optional[int] = None,
-        tool: Optional[str] = None,
-        properties: Optional[Dict[str, Any]] = None,
-    ) -> Dict[str, Any]:
-        """Add a node to the graph."""
-        with self._lock:
-            if node_id in self.graph:
-                raise ValueError(f"Node '{node_id}' already exists")
-
-            if node_type not in ["action", "decision", "verification", "loop", "success", "failure"]:
-                raise ValueError(f"Invalid node type: {node_type}")
-
-            node_attrs = {
-                "node_type": node_type,
-                "label": label or node_id,
-                "properties": properties or {},
-            }
+# Per-type attribute templates; the lookup doubles as node_type validation and
+# every stored node_type shares the canonical string from NODE_TYPES
+_BASE_ATTRS: Dict[str, Dict[str, str]] = {node_type: {"node_type": node_type} for node_type in NODE_TYPES}
 
-            if phase is not None:
-                node_attrs["phase"] = phase
-            if tool is not None:
-                node_attrs["tool"] = tool
+# Max number of find_path results kept per graph
+PATH_CACHE_SIZE = 1024
 
-            self.graph.add_node(node_id, **node_attrs)
-
-            return {
-                "node_id": node_id,
-                "node_type": node_type,
-                "status": "added",
-            }
-
-    def update_node(
-        self,
-        node_id: str,
-        label: Optional[str] = None,
-        phase: Optional[int] = None,
-        tool: Optional[str] = None,
-        properties: Optional[Dict[str, Any]] = None,
-    ) -> Dict[str, Any]:
-        """Update node properties."""
-        with self._lock:
-            if node_id not in self.graph:
-                raise ValueError(f"Node '{node_id}' does not exist")
 
-            if label is not None:
-                self.graph.nodes[node_id]["label"] = label
-            if phase is not None:
-                self.graph.nodes[node_id]["phase"] = phase
-            if tool is not None:
-                self.graph.nodes[node_id]["tool"] = tool
-            if properties is not None:
-                existing_props = self.graph.nodes[node_id].get("properties", {})
-                existing_props.update(properties)
-                self.graph.nodes[node_id]["properties"] = existing_props
+def _intern(value: Any) -> Any:
+    """Intern string attribute values; pass anything else through unchanged."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _node_attrs(
+    node_id: str,
+    node_type: str,
+    label: Optional[str],
+    phase: Any,
+    tool: Any,
+    properties: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Build a node's stored attribute dict (phase/tool only when set).
+
+    Raises ValueError for an unknown node_type.
+    """
+    base = _BASE_ATTRS.get(node_type)
+    if base is None:
+        raise ValueError(f"Invalid node type: {node_type}")
+    attrs = {**base, "label": label or node_id, "properties": properties or {}}
+    if phase is not None:
+        attrs["phase"] = phase
+    if tool is not None:
+        attrs["tool"] = tool
+    return attrs
+
+
+def _edge_attrs(order: int, condition: Optional[str], properties: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build an edge's stored attribute dict (condition only when set)."""
+    attrs = {
+        "order": order,
+        "properties": properties or {},
+    }
+    if condition is not None:
+        attrs["condition"] = condition
+    return attrs
+
+
+def _cached_by_version(copy_result: Callable[[Any], Any]) -> Callable[..., Any]:
+    """Memoize a zero-argument, read-only StateGraph method until the graph next changes.
+
+    The cache holds one (version, result) entry per method, so it never grows
+    past the number of decorated methods. Every call returns copy_result of the
+    cached value; pass a copier that is just deep enough for the result's
+    shape so callers may mutate what they receive.
+    """
+
+    def decorate(method: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        key = method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self: "StateGraph") -> Any:
+            version = self._version
+            hit = self._result_cache.get(key)
+            if hit is not None and hit[0] == version:
+                return copy_result(hit[1])
+            result = method(self)
+            self._result_cache[key] = (version, result)
+            return copy_result(result)
+
+        return wrapper
+
+    return decorate
+
+
+def _copy_graph_info(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a get_graph_info result (its nested dict and list included)."""
+    return {**info, "node_types": dict(info["node_types"]), "phases": list(info["phases"])}
+
+
+def _copy_validation(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a validate_graph result (its warnings list included)."""
+    return {**result, "warnings": list(result["warnings"])}
+
+
+class _RWLock:
+    """Readers-writer lock: many concurrent readers or one writer.
+
+    Waiting writers block new readers so a steady stream of reads cannot
+    starve mutations. Not reentrant.
+    """
+
+    __slots__ = ("_cond", "_readers", "_writer", "_writers_waiting")
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
 
-            return {
-                "node_id": node_id,
-                "status": "updated",
-            }
+class StateGraph:
+    """State-transition graph manager using NetworkX DiGraph (cycles allowed)."""
 
-    def remove_node(self, node_id: str) -> Dict[str, Any]:
-        """Remove a node from the graph."""
-        with self._lock:
-            if node_id not in self.graph:
-                raise ValueError(f"Node '{node_id}' does not exist")
+    __slots__ = (
+        "graph_id",
+        "graph",
+        "_lock",
+        "_nodes_by_type",
+        "_phase_counts",
+        "_isolated",
+        "_entries",
+        "_version",
+        "_result_cache",
+        "_path_cache",
+        "_path_cache_lock",
+    )
 
-            self.graph.remove_node(node_id)
+    def __init__(self, graph_id: str) -> None:
+        self.graph_id = graph_id
+        self.graph = nx.DiGraph()
+        self._lock = _RWLock()  # Concurrent reads, exclusive mutations
+        # Secondary indices kept in step with node mutations
+        self._nodes_by_type: Dict[str, Set[str]] = defaultdict(set)
+        self._phase_counts: Counter = Counter()
+        # Nodes with no edges at all / no incoming edges, kept for validate_graph
+        self._isolated: Set[str] = set()
+        self._entries: Set[str] = set()
+        # Bumped by every mutator; cached query results are tagged with it
+        self._version = 0
+        self._result_cache: Dict[str, Tuple[int, Any]] = {}
+        # Bounded LRU for find_path, keyed by (from, to, version)
+        self._path_cache: "OrderedDict[Tuple[str, str, int], List[str]]" = OrderedDict()
+        self._path_cache_lock = threading.Lock()
+
+    def _index_node(self, node_id: str, attrs: Dict[str, Any]) -> None:
+        """Record a node in the type/phase indices."""
+        self._nodes_by_type[attrs.get("node_type", "unknown")].add(node_id)
+        if "phase" in attrs:
+            self._phase_counts[attrs["phase"]] += 1
+
+    def _unindex_node(self, node_id: str, attrs: Dict[str, Any]) -> None:
+        """Drop a node from the type/phase indices."""
+        node_type = attrs.get("node_type", "unknown")
+        ids = self._nodes_by_type[node_type]
+        ids.discard(node_id)
+        if not ids:
+            del self._nodes_by_type[node_type]
+        if "phase" in attrs:
+            self._discard_phase(attrs["phase"])
+
+    def _refresh_degree_sets(self, node_id: str) -> None:
+        """Re-derive a node's isolated/entry membership from its adjacency."""
+        has_in = bool(self.graph._pred[node_id])
+        if has_in:
+            self._entries.discard(node_id)
+        else:
+            self._entries.add(node_id)
+        if has_in or self.graph._succ[node_id]:
+            self._isolated.discard(node_id)
+        else:
+            self._isolated.add(node_id)
+
+    def _edge_attrs_or_raise(self, from_node: str, to_node: str) -> Dict[str, Any]:
+        """Return an edge's stored attribute dict via _succ, or raise if it does not exist."""
+        succ = self.graph._succ.get(from_node)
+        edge_attrs = succ.get(to_node) if succ is not None else None
+        if edge_attrs is None:
+            raise ValueError(f"Edge from '{from_node}' to '{to_node}' does not exist")
+        return edge_attrs
+
+    def _discard_phase(self, phase: Any) -> None:
+        """Decrement a phase's node count, forgetting it at zero."""
+        self._phase_counts[phase] -= 1
+        if self._phase_counts[phase] <= 0:
+            del self._phase_counts[phase]
+
+    @classmethod
+    def from_dict(cls, graph_id: str, data: Dict[str, Any]) -> "StateGraph":
+        """Build a graph from exported/imported data in one bulk pass.
+
+        Accepts the export format ({"nodes": {id: attrs}, "edges": [...]}) plus the
+        legacy "type"/"name" node keys and "parent"/"child" edge keys. Node types
+        and edge endpoints are validated before anything is added.
 
-            return {
-                "node_id": node_id,
-                "status": "removed",
-            }
+        Args:
+            graph_id: Identifier for the new graph
+            data: Parsed YAML/JSON graph data
 
-    def add_edge(
-        self,
-        from_node: str,
-        to_node: str,
-        order: int = 0,
-        condition: Optional[str] = None,
-        properties: Optional[Dict[str, Any]] = None,
-    ) -> Dict[str, Any]:
-        """Add an edge to the graph."""
-        with self._lock:
-            if from_node not in self.graph:
+        Returns:
+            Populated StateGraph
+        """
+        node_items = []
+        for node_id, node_data in data.get("nodes", {}).items():
+            # phase/tool repeat across nodes, so share one string each
+            node_attrs = _node_attrs(
+                node_id,
+                node_data.get("node_type") or node_data.get("type", "action"),
+                node_data.get("label") or node_data.get("name"),
+                _intern(node_data.get("phase")),
+                _intern(node_data.get("tool")),
+                node_data.get("properties"),
+            )
+            node_items.append((node_id, node_attrs))
+
+        known = {node_id for node_id, _ in node_items}
+        edge_items = []
+        for edge in data.get("edges", []):
+            from_node = edge.get("from") or edge.get("parent")
+            to_node = edge.get("to") or edge.get("child")
+            if from_node not in known:
                 raise ValueError(f"Source node '{from_node}' does not exist")
-            if to_node not in self.graph:
+            if to_node not in known:
                 raise ValueError(f"Target node '{to_node}' does not exist")
+            edge_attrs = _edge_attrs(edge.get("order", 0), edge.get("condition"), edge.get("properties"))
+            edge_items.append((from_node, to_node, edge_attrs))
 
-            edge_attrs = {
-                "order": order,
-                "properties": properties or {},
-            }
-
-            if condition is not None:
-                edge_attrs["condition"] = condition
-
-            self.graph.add_edge(from_node, to_node, **edge_attrs)
-
-            return {
-                "from": from_node,
-                "to": to_node,
-                "status": "added",
-            }
-
-    def remove_edge(self, from_node: str, to_node: str) -> Dict[str, Any]:
-        """Remove an edge from the graph."""
-        with self._lock:
-            if not self.graph.has_edge(from_node, to_node):
-                raise ValueError(f"Edge from '{from_node}' to '{to_node}' does not exist")
-
-            self.graph.remove_edge(from_node, to_node)
-
-            return {
-                "from": from_node,
-                "to": to_node,
-                "status": "removed",
-            }
-
-    def set_edge_order(self, from_node: str, to_node: str, order: int) -> Dict[str, Any]:
-        """Set execution order for an edge."""
-        with self._lock:
-            if not self.graph.has_edge(from_node, to_node):
-                raise ValueError(f"Edge from '{from_node}' to '{to_node}' does not exist")
-
-            self.graph.edges[from_node, to_node]["order"] = order
-
-            return {
-                "from": from_node,
-                "to": to_node,
-                "order": order,
-                "status": "updated",
-            }
-
-    def set_edge_condition(
-        self, from_node: str, to_node: str, condition: Optional[str]
-    ) -> Dict[str, Any]:
-        """Set condition label for an edge."""
-        with self._lock:
-            if not self.graph.has_edge(from_node, to_node):
-                raise ValueError(f"Edge from '{from_node}' to '{to_node}' does not exist")
-
-            if condition is None:
-                if "condition" in self.graph.edges[from_node, to_node]:
-                    del self.graph.edges[from_node, to_node]["condition"]
-            else:
-                self.graph.edges[from_node, to_node]["condition"] = condition
-
-            return {
-                "from": from_node,
-                "to": to_node,
-                "condition": condition,
-                "status": "updated",
-            }
-
-    def get_graph_info(self) -> Dict[str, Any]:
-        """Get information about the graph."""
-        with self._lock:
-            node_types = {}
-            phases = set()
-            decision_count = 0
-            loop_count = 0
-
-            for node in self.graph.nodes():
-                node_data = self.graph.nodes[node]
-                node_type = node_data.get("node_type", "unknown")
-                node_types[node_type] = node_types.get(node_type, 0) + 1
-
-                if "phase" in node_data:
-                    phases.add(node_data["phase"])
-
-                if node_type == "decision":
-                    decision_count += 1
-                elif node_type == "loop":
-                    loop_count += 1
+        g = cls(graph_id)
+        g.graph.add_nodes_from(node_items)
+        g.graph.add_edges_from(edge_items)
+        for node_id, node_attrs in node_items:
+            g._index_node(node_id, node_attrs)
+            g._refresh_degree_sets(node_id)
+        return g
 
+    def create_graph(self) -> Dict[str, Any]:
+        """Create a new empty graph."""
+        with self._lock.read():
             return {
                 "graph_id": self.graph_id,
-                "num_nodes": self.graph.number_of_nodes(),
-                "num_edges": self.graph.number_of_edges(),
-                "node_types": node_types,
-                "phases": sorted(list(phases)) if phases else [],
-                "decision_points": decision_count,
-                "loops": loop_count,
-            }
-
-    def validate_graph(self) -> Dict[str, Any]:
-        """Validate graph structure (cycles allowed)."""
-        with self._lock:
-            warnings: List[str] = []
-
-            isolated = list(nx.isolates(self.graph))
-            if isolated:
-                warnings.append(f"Graph has isolated nodes: {isolated}")
-
-            entry_points = [n for n in self.graph.nodes() if self.graph.in_degree(n) == 0]
-            if len(entry_points) > 1:
-                warnings.append(f"Graph has multiple entry points: {entry_points}")
-
-            try:
-                cycles = list(nx.simple_cycles(self.graph))
-                if cycles:
-                    warnings.append(
-                        f"Graph contains {len(cycles)} cycle(s) (allowed in state-transition graphs)"
-                    )
-            except Exception:
-                pass
-
-            return {
-                "valid": True,
-                "warnings": warnings,
-            }
-
-    def get_node(self, node_id: str) -> Dict[str, Any]:
-        """Get node details."""
-        with self._lock:
-            if node_id not in self.graph:
-                raise ValueError(f"Node '{node_id}' does not exist")
-            data = dict(self.graph.nodes[node_id])
-            data["node_id"] = node_id
-            return data
-
-    def list_nodes(self) -> List[Dict[str, Any]]:
-        """List all nodes."""
-        with self._lock:
-            nodes = []
-            for node_id in self.graph.nodes():
-                node_data = dict(self.graph.nodes[node_id])
-                node_data["node_id"] = node_id
-                nodes.append(node_data)
-            return nodes
-
-    def get_edges(self, node_id: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get all edges, optionally filtered by node (incoming/outgoing)."""
-        with self._lock:
-            edges = []
-            if node_id is not None:
-                if node_id not in self.graph:
-                    raise ValueError(f"Node '{node_id}' does not exist")
-                for from_node, to_node, attrs in self.graph.in_edges(node_id, data=True):
-                    edge_data = dict(attrs)
-                    edge_data["from"] = from_node
-                    edge_data["to"] = to_node
-                    edges.append(edge_data)
-                for from_node, to_node, attrs in self.graph.out_edges(node_id, data=True):
-                    edge_data = dict(attrs)
-                    edge_data["from"] = from_node
-                    edge_data["to"] = to_node
-                    edges.append(edge_data)
-            else:
-                for from_node, to_node, attrs in self.graph.edges(data=True):
-                    edge_data = dict(attrs)
-                    edge_data["from"] = from_node
-                    edge_data["to"] = to_node
-                    edges.append(edge_data)
-            return edges
-
-    def get_node_edges(self, node_id: str) -> Dict[str, List[Dict[str, Any]]]:
-        """Get incoming and outgoing edges for a node."""
-        with self._lock:
-            if node_id not in self.graph:
-                raise ValueError(f"Node '{node_id}' does not exist")
-
-            incoming = []
-            for from_node, to_node, attrs in self.graph.in_edges(node_id, data=True):
-                edge_data = dict(attrs)
-                edge_data["from"] = from_node
-                edge_data["to"] = to_node
-                incoming.append(edge_data)
-
-            outgoing = []
-            for from_node, to_node, attrs in self.graph.out_edges(node_id, data=True):
-                edge_data = dict(attrs)
-                edge_data["from"] = from_node
-                edge_data["to"] = to_node
-                outgoing.append(edge_data)
-
-            return {
-                "node_id": node_id,
-                "incoming": incoming,
-                "outgoing": outgoing,
+                "status": "created",
+                "num_nodes": 0,
+                "num_edges": 0,
             }
 
-    def find_path(self, from_node: str, to_node: str) -> List[str]:
-        """Find a path between two nodes (shortest path)."""
-        with self._lock:
-            if from_node not in self.graph:
-                raise ValueError(f"Source node '{from_node}' does not exist")
-            if to_node not in self.graph:
-                raise ValueError(f"Target node '{to_node}' does not exist")
-
-            try:
-                path = nx.shortest_path(self.graph, from_node, to_node)
-                return path
-            except nx.NetworkXNoPath:
-                return []
-
     def get_execution_sequence(self, from_node: str, until_decision: bool = True) -> List[Dict[str, Any]]:
         """Get nodes in execution order from a start node, following edges by order attribute.
         
@@ -335,42 +285,68 @@ class StateGraph:
         Returns:
             List of node dictionaries with execution order information
         """
-        with self._lock:
-            if from_node not in self.graph:
+        with self._lock.read():
+            if from_node not in self.graph._node:
                 raise ValueError(f"Source node '{from_node}' does not exist")
             
             sequence = []
             visited = set()
             current = from_node
             
+            nodes_map = self.graph._node
+            succ_map = self.graph._succ
+
             while current and current not in visited:
                 visited.add(current)
-                node_data = dict(self.graph.nodes[current])
-                node_data["node_id"] = current
+                node_data = {**nodes_map[current], "node_id": current}
+                # Callers may edit the records; keep the stored properties out of reach
+                if "properties" in node_data:
+                    node_data["properties"] = dict(node_data["properties"])
                 sequence.append(node_data)
                 
                 # Stop if we hit a decision node and until_decision is True
                 if until_decision and node_data.get("node_type") == "decision":
                     break
                 
-                # Get outgoing edges sorted by order
-                outgoing = []
-                for from_n, to_n, attrs in self.graph.out_edges(current, data=True):
-                    edge_data = dict(attrs)
-                    edge_data["from"] = from_n
-                    edge_data["to"] = to_n
-                    outgoing.append(edge_data)
-                
-                if not outgoing:
+                succ = succ_map[current]
+                if not succ:
                     break
                 
-                # Sort by order, then take the first one (lowest order)
-                outgoing.sort(key=lambda e: e.get("order", 0))
-                next_edge = outgoing[0]
-                current = next_edge["to"]
+                # Follow the lowest-order edge (first one wins on ties)
+                current = min(succ, key=lambda v: succ[v].get("order", 0))
             
             return sequence
 
+    @_cached_by_version(list)  # Node IDs are immutable; a shallow copy suffices
+    def toposort(self) -> List[str]:
+        """Get all node IDs in topological order (Kahn's algorithm, O(V+E)).
+
+        Nodes with no ordering constraint between them keep insertion order.
+
+        Returns:
+            List of node IDs, each after all of its predecessors
+
+        Raises:
+            ValueError: If the graph contains a cycle
+        """
+        with self._lock.read():
+            succ_map = self.graph._succ
+            # In-degrees come straight from the predecessor dicts
+            in_degree = {node_id: len(preds) for node_id, preds in self.graph._pred.items()}
+            queue = deque(node_id for node_id, degree in in_degree.items() if degree == 0)
+            order = []
+            while queue:
+                node_id = queue.popleft()
+                order.append(node_id)
+                for succ in succ_map[node_id]:
+                    in_degree[succ] -= 1
+                    if in_degree[succ] == 0:
+                        queue.append(succ)
+
+            if len(order) < len(in_degree):
+                raise ValueError("Graph contains cycle(s); no topological order exists")
+            return order
+
     def add_node(
         self,
         node_id: str,
@@ -393,26 +369,16 @@ class StateGraph:
         Returns:
             Dictionary with node creation info
         """
-        with self._lock:
-            if node_id in self.graph:
+        with self._lock.write():
+            if node_id in self.graph._node:
                 raise ValueError(f"Node '{node_id}' already exists")
 
-            if node_type not in ["action", "decision", "verification", "loop", "success", "failure"]:
-                raise ValueError(f"Invalid node type: {node_type}")
-
-            # Set node attributes
-            node_attrs = {
-                "node_type": node_type,
-                "label": label or node_id,
-                "properties": properties or {},
-            }
-
-            if phase is not None:
-                node_attrs["phase"] = phase
-            if tool is not None:
-                node_attrs["tool"] = tool
-
+            node_attrs = _node_attrs(node_id, node_type, label, phase, tool, properties)
+            self._version += 1
             self.graph.add_node(node_id, **node_attrs)
+            self._index_node(node_id, node_attrs)
+            self._isolated.add(node_id)
+            self._entries.add(node_id)
 
             return {
                 "node_id": node_id,
@@ -420,6 +386,49 @@ class StateGraph:
                 "status": "added",
             }
 
+    def add_nodes_bulk(self, nodes: List[Dict[str, Any]]) -> int:
+        """Add many nodes under a single lock acquisition.
+
+        The whole batch is validated (types, duplicates within the batch and
+        against the graph) before any node is added.
+
+        Args:
+            nodes: Node specs with node_id, node_type and optional label, phase, tool, properties
+
+        Returns:
+            Number of nodes added
+        """
+        node_items = []
+        batch_ids = set()
+        for node in nodes:
+            node_id = node["node_id"]
+            node_attrs = _node_attrs(
+                node_id,
+                node["node_type"],
+                node.get("label"),
+                node.get("phase"),
+                node.get("tool"),
+                node.get("properties"),
+            )
+            if node_id in batch_ids:
+                raise ValueError(f"Node '{node_id}' already exists")
+            batch_ids.add(node_id)
+            node_items.append((node_id, node_attrs))
+
+        with self._lock.write():
+            existing = self.graph._node
+            if not existing.keys().isdisjoint(batch_ids):
+                node_id = next(node_id for node_id, _ in node_items if node_id in existing)
+                raise ValueError(f"Node '{node_id}' already exists")
+            self._version += 1
+            self.graph.add_nodes_from(node_items)
+            for node_id, node_attrs in node_items:
+                self._index_node(node_id, node_attrs)
+            self._isolated.update(batch_ids)
+            self._entries.update(batch_ids)
+
+        return len(node_items)
+
     def update_node(
         self,
         node_id: str,
@@ -440,20 +449,26 @@ class StateGraph:
         Returns:
             Dictionary with update info
         """
-        with self._lock:
-            if node_id not in self.graph:
+        with self._lock.write():
+            # One lookup for both the existence check and the attribute dict
+            node_attrs = self.graph._node.get(node_id)
+            if node_attrs is None:
                 raise ValueError(f"Node '{node_id}' does not exist")
+            self._version += 1
 
             if label is not None:
-                self.graph.nodes[node_id]["label"] = label
+                node_attrs["label"] = label
             if phase is not None:
-                self.graph.nodes[node_id]["phase"] = phase
+                if "phase" in node_attrs:
+                    self._discard_phase(node_attrs["phase"])
+                node_attrs["phase"] = phase
+                self._phase_counts[phase] += 1
             if tool is not None:
-                self.graph.nodes[node_id]["tool"] = tool
+                node_attrs["tool"] = tool
             if properties is not None:
-                existing_props = self.graph.nodes[node_id].get("properties", {})
+                existing_props = node_attrs.get("properties", {})
                 existing_props.update(properties)
-                self.graph.nodes[node_id]["properties"] = existing_props
+                node_attrs["properties"] = existing_props
 
             return {
                 "node_id": node_id,
@@ -469,11 +484,19 @@ class StateGraph:
         Returns:
             Dictionary with removal info
         """
-        with self._lock:
-            if node_id not in self.graph:
+        with self._lock.write():
+            node_attrs = self.graph._node.get(node_id)
+            if node_attrs is None:
                 raise ValueError(f"Node '{node_id}' does not exist")
+            self._version += 1
 
+            self._unindex_node(node_id, node_attrs)
+            neighbors = (self.graph._pred[node_id].keys() | self.graph._succ[node_id].keys()) - {node_id}
             self.graph.remove_node(node_id)
+            self._isolated.discard(node_id)
+            self._entries.discard(node_id)
+            for neighbor in neighbors:
+                self._refresh_degree_sets(neighbor)
 
             return {
                 "node_id": node_id,
@@ -500,21 +523,19 @@ class StateGraph:
         Returns:
             Dictionary with edge creation info
         """
-        with self._lock:
-            if from_node not in self.graph:
+        with self._lock.write():
+            nodes_map = self.graph._node
+            if from_node not in nodes_map:
                 raise ValueError(f"Source node '{from_node}' does not exist")
-            if to_node not in self.graph:
+            if to_node not in nodes_map:
                 raise ValueError(f"Target node '{to_node}' does not exist")
+            self._version += 1
 
-            edge_attrs = {
-                "order": order,
-                "properties": properties or {},
-            }
-
-            if condition is not None:
-                edge_attrs["condition"] = condition
-
+            edge_attrs = _edge_attrs(order, condition, properties)
             self.graph.add_edge(from_node, to_node, **edge_attrs)
+            self._isolated.discard(from_node)
+            self._isolated.discard(to_node)
+            self._entries.discard(to_node)
 
             return {
                 "from": from_node,
@@ -522,6 +543,38 @@ class StateGraph:
                 "status": "added",
             }
 
+    def add_edges_bulk(self, edges: List[Dict[str, Any]]) -> int:
+        """Add many edges under a single lock acquisition.
+
+        Every endpoint is checked before any edge is added.
+
+        Args:
+            edges: Edge specs with from, to and optional order, condition, properties
+
+        Returns:
+            Number of edges added
+        """
+        edge_items = [
+            (edge["from"], edge["to"], _edge_attrs(edge.get("order", 0), edge.get("condition"), edge.get("properties")))
+            for edge in edges
+        ]
+
+        with self._lock.write():
+            nodes = self.graph._node
+            for from_node, to_node, _ in edge_items:
+                if from_node not in nodes:
+                    raise ValueError(f"Source node '{from_node}' does not exist")
+                if to_node not in nodes:
+                    raise ValueError(f"Target node '{to_node}' does not exist")
+            self._version += 1
+            self.graph.add_edges_from(edge_items)
+            for from_node, to_node, _ in edge_items:
+                self._isolated.discard(from_node)
+                self._isolated.discard(to_node)
+                self._entries.discard(to_node)
+
+        return len(edge_items)
+
     def remove_edge(self, from_node: str, to_node: str) -> Dict[str, Any]:
         """Remove an edge from the graph.
 
@@ -532,11 +585,12 @@ class StateGraph:
         Returns:
             Dictionary with edge removal info
         """
-        with self._lock:
-            if not self.graph.has_edge(from_node, to_node):
-                raise ValueError(f"Edge from '{from_node}' to '{to_node}' does not exist")
-
+        with self._lock.write():
+            self._edge_attrs_or_raise(from_node, to_node)
+            self._version += 1
             self.graph.remove_edge(from_node, to_node)
+            self._refresh_degree_sets(from_node)
+            self._refresh_degree_sets(to_node)
 
             return {
                 "from": from_node,
@@ -555,11 +609,10 @@ class StateGraph:
         Returns:
             Dictionary with update info
         """
-        with self._lock:
-            if not self.graph.has_edge(from_node, to_node):
-                raise ValueError(f"Edge from '{from_node}' to '{to_node}' does not exist")
-
-            self.graph.edges[from_node, to_node]["order"] = order
+        with self._lock.write():
+            edge_attrs = self._edge_attrs_or_raise(from_node, to_node)
+            self._version += 1
+            edge_attrs["order"] = order
 
             return {
                 "from": from_node,
@@ -579,15 +632,13 @@ class StateGraph:
         Returns:
             Dictionary with update info
         """
-        with self._lock:
-            if not self.graph.has_edge(from_node, to_node):
-                raise ValueError(f"Edge from '{from_node}' to '{to_node}' does not exist")
-
+        with self._lock.write():
+            edge_attrs = self._edge_attrs_or_raise(from_node, to_node)
+            self._version += 1
             if condition is None:
-                if "condition" in self.graph.edges[from_node, to_node]:
-                    del self.graph.edges[from_node, to_node]["condition"]
+                edge_attrs.pop("condition", None)
             else:
-                self.graph.edges[from_node, to_node]["condition"] = condition
+                edge_attrs["condition"] = condition
 
             return {
                 "from": from_node,
@@ -596,67 +647,56 @@ class StateGraph:
                 "status": "updated",
             }
 
+    @_cached_by_version(_copy_graph_info)
     def get_graph_info(self) -> Dict[str, Any]:
         """Get information about the graph.
 
         Returns:
             Dictionary with graph information
         """
-        with self._lock:
-            node_types = {}
-            phases = set()
-            decision_count = 0
-            loop_count = 0
-
-            for node in self.graph.nodes():
-                node_data = self.graph.nodes[node]
-                node_type = node_data.get("node_type", "unknown")
-                node_types[node_type] = node_types.get(node_type, 0) + 1
-
-                if "phase" in node_data:
-                    phases.add(node_data["phase"])
-
-                if node_type == "decision":
-                    decision_count += 1
-                elif node_type == "loop":
-                    loop_count += 1
+        with self._lock.read():
+            # Served from the type/phase indices; no node scan
+            node_types = {node_type: len(ids) for node_type, ids in self._nodes_by_type.items()}
+            phases = self._phase_counts
 
             return {
                 "graph_id": self.graph_id,
                 "num_nodes": self.graph.number_of_nodes(),
                 "num_edges": self.graph.number_of_edges(),
                 "node_types": node_types,
-                "phases": sorted(list(phases)) if phases else [],
-                "decision_points": decision_count,
-                "loops": loop_count,
+                "phases": sorted(phases),
+                "decision_points": node_types.get("decision", 0),
+                "loops": node_types.get("loop", 0),
             }
 
+    @_cached_by_version(_copy_validation)
     def validate_graph(self) -> Dict[str, Any]:
         """Validate graph structure.
 
         Returns:
             Dictionary with validation results (warnings only, cycles allowed)
         """
-        with self._lock:
+        with self._lock.read():
             warnings: List[str] = []
 
-            # Check for isolated nodes
-            isolated = list(nx.isolates(self.graph))
-            if isolated:
+            # Check for isolated nodes (maintained incrementally; sorted for stable output)
+            if self._isolated:
+                isolated = sorted(self._isolated, key=str)
                 warnings.append(f"Graph has isolated nodes: {isolated}")
 
             # Check for nodes with no incoming edges (potential entry points)
-            entry_points = [n for n in self.graph.nodes() if self.graph.in_degree(n) == 0]
-            if len(entry_points) > 1:
+            if len(self._entries) > 1:
+                entry_points = sorted(self._entries, key=str)
                 warnings.append(f"Graph has multiple entry points: {entry_points}")
 
-            # Check for cycles (informational, not an error)
+            # Check for cycles (informational, not an error). Finding one cycle
+            # is linear; counting them all is exponential in the worst case.
             try:
-                cycles = list(nx.simple_cycles(self.graph))
-                if cycles:
-                    warnings.append(f"Graph contains {len(cycles)} cycle(s) (allowed in state-transition graphs)")
-            except Exception:
+                nx.find_cycle(self.graph, orientation="original")
+            except nx.NetworkXNoCycle:
                 pass
+            else:
+                warnings.append("Graph contains cycle(s) (allowed in state-transition graphs)")
 
             return {
                 "valid": True,  # Always valid, cycles allowed
@@ -670,13 +710,14 @@ class StateGraph:
             node_id: Node ID
 
         Returns:
-            Dictionary with node data
+            Dictionary with node data, including its node_id
         """
-        with self._lock:
-            if node_id not in self.graph:
+        with self._lock.read():
+            node_attrs = self.graph._node.get(node_id)
+            if node_attrs is None:
                 raise ValueError(f"Node '{node_id}' does not exist")
 
-            return dict(self.graph.nodes[node_id])
+            return {**node_attrs, "node_id": node_id}
 
     def list_nodes(self) -> List[Dict[str, Any]]:
         """List all nodes in the graph.
@@ -684,13 +725,20 @@ class StateGraph:
         Returns:
             List of node dictionaries
         """
-        with self._lock:
-            nodes = []
-            for node_id in self.graph.nodes():
-                node_data = dict(self.graph.nodes[node_id])
-                node_data["node_id"] = node_id
-                nodes.append(node_data)
-            return nodes
+        with self._lock.read():
+            return [{**node_data, "node_id": node_id} for node_id, node_data in self.graph._node.items()]
+
+    def iter_nodes(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over node dictionaries (same records as list_nodes).
+
+        The records are snapshotted under the read lock, which is released
+        before the first yield: the consuming loop may call other methods,
+        including mutators, without deadlocking.
+
+        Yields:
+            Node dictionaries
+        """
+        yield from self.list_nodes()
 
     def get_edges(self, node_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get all edges, optionally filtered by node.
@@ -701,29 +749,28 @@ class StateGraph:
         Returns:
             List of edge dictionaries
         """
-        with self._lock:
-            edges = []
-            if node_id is not None:
-                if node_id not in self.graph:
-                    raise ValueError(f"Node '{node_id}' does not exist")
-                # Get both incoming and outgoing edges
-                for from_node, to_node, attrs in self.graph.in_edges(node_id, data=True):
-                    edge_data = dict(attrs)
-                    edge_data["from"] = from_node
-                    edge_data["to"] = to_node
-                    edges.append(edge_data)
-                for from_node, to_node, attrs in self.graph.out_edges(node_id, data=True):
-                    edge_data = dict(attrs)
-                    edge_data["from"] = from_node
-                    edge_data["to"] = to_node
-                    edges.append(edge_data)
-            else:
-                for from_node, to_node, attrs in self.graph.edges(data=True):
-                    edge_data = dict(attrs)
-                    edge_data["from"] = from_node
-                    edge_data["to"] = to_node
-                    edges.append(edge_data)
-            return edges
+        with self._lock.read():
+            if node_id is None:
+                return [
+                    {**attrs, "from": from_node, "to": to_node}
+                    for from_node, nbrs in self.graph._succ.items()
+                    for to_node, attrs in nbrs.items()
+                ]
+            if node_id not in self.graph._node:
+                raise ValueError(f"Node '{node_id}' does not exist")
+            # Get both incoming and outgoing edges
+            return self._in_edge_records(node_id) + self._out_edge_records(node_id)
+
+    def iter_edges(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over edge dictionaries (same records as get_edges()).
+
+        Snapshotted under the read lock like iter_nodes, so the consuming loop
+        may call back into the graph.
+
+        Yields:
+            Edge dictionaries
+        """
+        yield from self.get_edges()
 
     def get_node_edges(self, node_id: str) -> Dict[str, List[Dict[str, Any]]]:
         """Get incoming and outgoing edges for a node.
@@ -734,30 +781,24 @@ class StateGraph:
         Returns:
             Dictionary with 'incoming' and 'outgoing' edge lists
         """
-        with self._lock:
-            if node_id not in self.graph:
+        with self._lock.read():
+            if node_id not in self.graph._node:
                 raise ValueError(f"Node '{node_id}' does not exist")
 
-            incoming = []
-            for from_node, to_node, attrs in self.graph.in_edges(node_id, data=True):
-                edge_data = dict(attrs)
-                edge_data["from"] = from_node
-                edge_data["to"] = to_node
-                incoming.append(edge_data)
-
-            outgoing = []
-            for from_node, to_node, attrs in self.graph.out_edges(node_id, data=True):
-                edge_data = dict(attrs)
-                edge_data["from"] = from_node
-                edge_data["to"] = to_node
-                outgoing.append(edge_data)
-
             return {
                 "node_id": node_id,
-                "incoming": incoming,
-                "outgoing": outgoing,
+                "incoming": self._in_edge_records(node_id),
+                "outgoing": self._out_edge_records(node_id),
             }
 
+    def _in_edge_records(self, node_id: str) -> List[Dict[str, Any]]:
+        """Edge dicts (attrs plus from/to) for a node's incoming edges, read from _pred."""
+        return [{**attrs, "from": from_node, "to": node_id} for from_node, attrs in self.graph._pred[node_id].items()]
+
+    def _out_edge_records(self, node_id: str) -> List[Dict[str, Any]]:
+        """Edge dicts (attrs plus from/to) for a node's outgoing edges, read from _succ."""
+        return [{**attrs, "from": node_id, "to": to_node} for to_node, attrs in self.graph._succ[node_id].items()]
+
     def find_path(self, from_node: str, to_node: str) -> List[str]:
         """Find a path between two nodes.
 
@@ -768,15 +809,46 @@ class StateGraph:
         Returns:
             List of node IDs in the path, or empty list if no path exists
         """
-        with self._lock:
-            if from_node not in self.graph:
+        with self._lock.read():
+            if from_node not in self.graph._node:
                 raise ValueError(f"Source node '{from_node}' does not exist")
-            if to_node not in self.graph:
+            if to_node not in self.graph._node:
                 raise ValueError(f"Target node '{to_node}' does not exist")
 
-            try:
-                path = nx.shortest_path(self.graph, from_node, to_node)
-                return path
-            except nx.NetworkXNoPath:
-                return []
-
+            # Entries from older versions are never hit again and age out of the LRU
+            key = (from_node, to_node, self._version)
+            with self._path_cache_lock:
+                path = self._path_cache.get(key)
+                if path is not None:
+                    self._path_cache.move_to_end(key)
+                    return list(path)
+
+            path = self._bfs_path(from_node, to_node)
+
+            with self._path_cache_lock:
+                self._path_cache[key] = path
+                if len(self._path_cache) > PATH_CACHE_SIZE:
+                    self._path_cache.popitem(last=False)
+            return list(path)
+
+    def _bfs_path(self, source: str, target: str) -> List[str]:
+        """Unweighted shortest path by plain BFS over _succ ([] if unreachable)."""
+        if source == target:
+            return [source]
+        succ_map = self.graph._succ
+        parent: Dict[str, Optional[str]] = {source: None}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for nbr in succ_map[node]:
+                if nbr in parent:
+                    continue
+                parent[nbr] = node
+                if nbr == target:
+                    path = [nbr]
+                    while parent[path[-1]] is not None:
+                        path.append(parent[path[-1]])
+                    path.reverse()
+                    return path
+                queue.append(nbr)
+        return []
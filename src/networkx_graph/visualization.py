@@ -1,14 +1,158 @@
 """Graph visualization and export utilities using matplotlib."""
 
+import dataclasses
+import functools
+import importlib.util
+import inspect
+import io
+import os
+import threading
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from xml.sax.saxutils import escape
 
-import matplotlib
-import matplotlib.pyplot as plt
 import networkx as nx
 import yaml
 
-matplotlib.use("Agg")  # Non-interactive backend
+from . import jsonio
+
+try:  # Prefer the libyaml-backed loader/dumper when PyYAML was built with it
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class ExportResult:
+    """File written by an exporter."""
+
+    graph_id: str
+    format: str
+    file_path: str
+    absolute_path: str
+    file_size_bytes: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict for JSON responses (field order preserved)."""
+        return {f.name: getattr(self, f.name) for f in dataclasses.fields(self)}
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class RenderResult(ExportResult):
+    """Image written by visualize_graph."""
+
+    layout: str
+    num_nodes: int
+    num_edges: int
+
+
+# Fast PNG encoding: flat-colour plots barely shrink past zlib level 1
+_PNG_PIL_KWARGS = {"compress_level": 1, "optimize": False}
+
+
+# Render-only rcParams, applied with rc_context so the host process's settings
+# are untouched: labels are plain text (no mathtext parsing of "$"), axes are
+# hidden, and long edge paths are split into chunks Agg can render in one go
+_RC_PARAMS = {
+    "text.usetex": False,
+    "text.parse_math": False,
+    "axes.unicode_minus": False,
+    "path.simplify": True,
+    "path.simplify_threshold": 1.0,
+    "agg.path.chunksize": 10000,
+    "figure.autolayout": False,
+}
+
+# Idle figures by figsize, reused across renders instead of rebuilt each time
+_FIGURE_POOL: Dict[Tuple[float, float], List[Tuple[Any, Any]]] = {}
+_FIGURE_POOL_LOCK = threading.Lock()
+_FIGURE_POOL_MAX = 2  # Per figsize
+
+
+@functools.cache
+def _figure_class() -> Any:
+    """Import matplotlib's Figure on first use (matplotlib is slow to import).
+
+    Figures are created directly rather than through pyplot, so no global
+    figure manager is involved; saving goes through Agg.
+    """
+    import matplotlib
+
+    # networkx's drawing helpers import pyplot; keep that headless too
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    return Figure
+
+
+def _render_rc_context() -> Any:
+    """Context manager applying _RC_PARAMS for the duration of one render."""
+    _figure_class()  # Selects the backend on first use
+    import matplotlib
+
+    return matplotlib.rc_context(_RC_PARAMS)
+
+
+def _acquire_figure(figsize: Tuple[float, float]) -> Tuple[Any, Any]:
+    """Take a cleared (figure, axes) pair from the pool, or build one."""
+    key = (float(figsize[0]), float(figsize[1]))
+    with _FIGURE_POOL_LOCK:
+        pooled = _FIGURE_POOL.get(key)
+        if pooled:
+            return pooled.pop()
+    fig = _figure_class()(figsize=key)
+    return fig, fig.add_subplot()
+
+
+def _release_figure(fig: Any, ax: Any) -> None:
+    """Clear a figure's axes and return it to the pool (dropped if the pool is full)."""
+    ax.clear()
+    key = tuple(fig.get_size_inches())
+    with _FIGURE_POOL_LOCK:
+        pooled = _FIGURE_POOL.setdefault(key, [])
+        if len(pooled) < _FIGURE_POOL_MAX:
+            pooled.append((fig, ax))
+
+
+# Above this size spring layouts switch to networkx's energy (L-BFGS) solver
+_ENERGY_LAYOUT_MIN_NODES = 500
+
+
+@functools.cache
+def _has_energy_layout() -> bool:
+    """True when spring_layout accepts method="energy" (networkx>=3.5) and scipy is installed."""
+    return (
+        "method" in inspect.signature(nx.spring_layout).parameters
+        and importlib.util.find_spec("scipy") is not None
+    )
+
+
+def _spring_layout(graph: nx.DiGraph) -> Dict[Any, Any]:
+    """Spring layout; large graphs use the energy solver, which needs far fewer force evaluations."""
+    if graph.number_of_nodes() > _ENERGY_LAYOUT_MIN_NODES and _has_energy_layout():
+        return nx.spring_layout(graph, k=2, iterations=50, method="energy")
+    return nx.spring_layout(graph, k=2, iterations=50)
+
+
+@functools.lru_cache(maxsize=128)
+def _compute_layout(
+    nodes: Tuple[Any, ...], edges: FrozenSet[Tuple[Any, Any]], layout: str
+) -> Dict[Any, Any]:
+    """Node positions for a topology (node order + edge set) and layout name.
+
+    Cached; callers must copy the dict before modifying it.
+    """
+    graph = nx.DiGraph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from(edges)
+    if layout == "spring":
+        return _spring_layout(graph)
+    if layout == "circular":
+        return nx.circular_layout(graph)
+    if layout == "kamada_kawai":
+        return nx.kamada_kawai_layout(graph)
+    return nx.spring_layout(graph)
 
 
 def visualize_graph(
@@ -20,20 +164,16 @@ def visualize_graph(
     show_labels: bool = True,
     dpi: int = 90,
     figsize: Tuple[int, int] = (10, 8),
-) -> Dict[str, Any]:
-    """Render graph to PNG file."""
+    fmt: str = "png",
+) -> RenderResult:
+    """Render graph to a PNG (matplotlib) or SVG (written directly) file."""
     if graph.number_of_nodes() == 0:
         raise ValueError("Graph is empty, cannot visualize")
+    if fmt not in ("png", "svg"):
+        raise ValueError(f"Unsupported format: {fmt}")
 
-    # Layout
-    if layout == "spring":
-        pos = nx.spring_layout(graph, k=2, iterations=100)
-    elif layout == "circular":
-        pos = nx.circular_layout(graph)
-    elif layout == "kamada_kawai":
-        pos = nx.kamada_kawai_layout(graph)
-    else:
-        pos = nx.spring_layout(graph)
+    # Positions depend only on topology, so re-renders reuse the cached layout
+    pos = dict(_compute_layout(tuple(graph), frozenset(graph.edges()), layout))
 
     # Colors by node type
     type_colors = {
@@ -44,13 +184,105 @@ def visualize_graph(
         "success": "#86efac",
         "failure": "#fca5a5",
     }
-    node_colors = []
-    for n in graph.nodes():
-        t = graph.nodes[n].get("node_type", "action")
-        node_colors.append(type_colors.get(t, "#cbd5e1"))
+    # One pass over the node data for both fill colours and label text
+    node_colors: List[str] = []
+    labels: Optional[Dict[Any, str]] = {} if show_labels else None
+    for n, d in graph.nodes(data=True):
+        ntype = d.get("node_type", "action")
+        node_colors.append(type_colors.get(ntype, "#cbd5e1"))
+        if labels is not None:
+            label = d.get("label", n)
+            labels[n] = f"{label}\n({ntype})" if d.get("node_type") else label
+
+    file_path = _render_path(graph_id, output_dir, filename, fmt)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if fmt == "svg":
+        # Plain string formatting: no figure, font cache or rasterization
+        size = (figsize[0] * dpi, figsize[1] * dpi)
+        payload = _render_svg(graph, graph_id, pos, node_colors, labels, size).encode()
+    else:
+        # rcParams are read both when artists are created and when they're drawn
+        with _render_rc_context():
+            # Each caller owns its pooled figure until release; figures aren't thread-safe
+            fig, ax = _acquire_figure(figsize)
+            try:
+                _draw_graph(graph, graph_id, pos, ax, node_colors, labels)
+                fig.tight_layout()
+                # No bbox_inches="tight": tight_layout() already fits the axes, and the
+                # tight bbox would cost an extra full draw per save
+                buf = io.BytesIO()
+                fig.savefig(buf, format="png", dpi=dpi, pil_kwargs=_PNG_PIL_KWARGS)
+            finally:
+                _release_figure(fig, ax)
+        payload = buf.getbuffer()
+    # Encode in memory, then hand the file one write; its size is the payload length
+    file_path.write_bytes(payload)
+
+    return RenderResult(
+        graph_id=graph_id,
+        format=fmt,
+        file_path=str(file_path),
+        absolute_path=str(file_path.absolute()),
+        file_size_bytes=len(payload),
+        layout=layout,
+        num_nodes=graph.number_of_nodes(),
+        num_edges=graph.number_of_edges(),
+    )
+
+
+def _render_path(graph_id: str, output_dir: str, filename: Optional[str], fmt: str) -> Path:
+    """Output file for a render: filename (or "<graph_id>") with the format's extension."""
+    if filename is None:
+        filename = f"{graph_id}.{fmt}"
+    if not filename.endswith(f".{fmt}"):
+        filename += f".{fmt}"
+    return Path(output_dir) / filename
 
-    fig, ax = plt.subplots(figsize=figsize)
 
+def visualize_graphs_batch(
+    graphs: List[Tuple[nx.DiGraph, str]],
+    max_workers: Optional[int] = None,
+    **kwargs: Any,
+) -> List[RenderResult]:
+    """Render several graphs, in parallel worker processes when there's more than one.
+
+    matplotlib is not thread-safe but renders fine in separate processes.
+    kwargs are passed to visualize_graph; results come back in input order.
+
+    Raises:
+        ValueError: If two graphs would be written to the same file (a repeated
+            graph_id, or a shared filename), checked before anything renders
+    """
+    paths: Dict[Path, str] = {}
+    for _, graph_id in graphs:
+        path = _render_path(
+            graph_id, kwargs.get("output_dir", "graphs"), kwargs.get("filename"), kwargs.get("fmt", "png")
+        ).resolve()
+        if path in paths:
+            raise ValueError(f"Graphs '{paths[path]}' and '{graph_id}' would both be written to {path}")
+        paths[path] = graph_id
+
+    if len(graphs) <= 1:
+        return [visualize_graph(graph, graph_id, **kwargs) for graph, graph_id in graphs]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(len(graphs), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(visualize_graph, graph, graph_id, **kwargs) for graph, graph_id in graphs]
+        return [f.result() for f in futures]
+
+
+def _draw_graph(
+    graph: nx.DiGraph,
+    graph_id: str,
+    pos: Dict[Any, Any],
+    ax: Any,
+    node_colors: List[str],
+    labels: Optional[Dict[Any, str]],
+) -> None:
+    """Draw edges, nodes, labels and title onto an axes."""
     nx.draw_networkx_edges(
         graph,
         pos,
@@ -72,126 +304,175 @@ def visualize_graph(
         linewidths=1.2,
     )
 
-    if show_labels:
-        labels = {}
-        for n in graph.nodes():
-            label = graph.nodes[n].get("label", n)
-            ntype = graph.nodes[n].get("node_type", "")
-            labels[n] = f"{label}\n({ntype})" if ntype else label
+    if labels is not None:
         nx.draw_networkx_labels(graph, pos, labels=labels, ax=ax, font_size=8, font_weight="bold")
 
-    # Edge labels (order / condition)
-    edge_labels = {}
-    for u, v, data in graph.edges(data=True):
-        parts = []
-        if "order" in data:
-            parts.append(f"order={data['order']}")
-        if "condition" in data:
-            parts.append(f"cond={data['condition']}")
-        if parts:
-            edge_labels[(u, v)] = ", ".join(parts)
+    edge_labels = _edge_labels(graph)
     if edge_labels:
         nx.draw_networkx_edge_labels(graph, pos, edge_labels=edge_labels, font_size=7, ax=ax)
 
     ax.set_title(f"Graph: {graph_id}", fontsize=14, fontweight="bold")
     ax.axis("off")
-    plt.tight_layout()
 
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
-    if filename is None:
-        filename = f"{graph_id}.png"
-    if not filename.endswith(".png"):
-        filename += ".png"
-    file_path = output_path / filename
 
-    plt.savefig(file_path, format="png", dpi=dpi, bbox_inches="tight")
-    plt.close(fig)
+# Edge attributes shown in edge labels, with their display names
+_EDGE_LABEL_KEYS = (("order", "order"), ("condition", "cond"))
+
 
+def _edge_labels(graph: nx.DiGraph) -> Dict[Tuple[Any, Any], str]:
+    """Edge label text (order / condition) for edges that have either."""
+    # Cheap membership probe first: unlabelled edges never reach the join
     return {
-        "graph_id": graph_id,
-        "format": "png",
-        "file_path": str(file_path),
-        "absolute_path": str(file_path.absolute()),
-        "file_size_bytes": file_path.stat().st_size,
-        "layout": layout,
-        "num_nodes": graph.number_of_nodes(),
-        "num_edges": graph.number_of_edges(),
+        (u, v): ", ".join(f"{name}={d[key]}" for key, name in _EDGE_LABEL_KEYS if key in d)
+        for u, v, d in graph.edges(data=True)
+        if "order" in d or "condition" in d
     }
 
 
-def export_graph_yaml(graph: nx.DiGraph, graph_id: str, output_path: str) -> Dict[str, Any]:
-    """Export graph to YAML file."""
-    data = {
-        "graph_id": graph_id,
-        "nodes": {},
-        "edges": [],
+# SVG geometry in pixels, roughly matching the matplotlib rendering at 90 dpi
+_SVG_MARGIN = 60
+_SVG_NODE_RADIUS = 24
+
+
+def _render_svg(
+    graph: nx.DiGraph,
+    graph_id: str,
+    pos: Dict[Any, Any],
+    node_colors: List[str],
+    labels: Optional[Dict[Any, str]],
+    size: Tuple[float, float],
+) -> str:
+    """Render the graph as SVG text (edges, arrowheads, nodes, labels, title)."""
+    width, height = size
+    xs = [float(p[0]) for p in pos.values()]
+    ys = [float(p[1]) for p in pos.values()]
+    min_x, min_y = min(xs), min(ys)
+    span_x = (max(xs) - min_x) or 1.0
+    span_y = (max(ys) - min_y) or 1.0
+    inner_w = width - 2 * _SVG_MARGIN
+    inner_h = height - 2 * _SVG_MARGIN
+    # Layout y grows upwards, SVG y grows downwards
+    xy = {
+        n: (
+            _SVG_MARGIN + (float(p[0]) - min_x) / span_x * inner_w,
+            height - _SVG_MARGIN - (float(p[1]) - min_y) / span_y * inner_h,
+        )
+        for n, p in pos.items()
     }
-    for n in graph.nodes():
-        node_data = dict(graph.nodes[n])
-        node_data["node_id"] = n
-        data["nodes"][n] = node_data
-    for u, v, attrs in graph.edges(data=True):
-        edge_data = dict(attrs)
-        edge_data["from"] = u
-        edge_data["to"] = v
-        data["edges"].append(edge_data)
 
-    path = Path(output_path)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w") as f:
-        yaml.safe_dump(data, f, sort_keys=False)
+    buf = io.StringIO()
+    w = buf.write
+    w(
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:g}" height="{height:g}" '
+        f'viewBox="0 0 {width:g} {height:g}" font-family="sans-serif">\n'
+        '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" '
+        'markerWidth="8" markerHeight="8" orient="auto-start-reverse">'
+        '<path d="M0,0 L10,5 L0,10 z"/></marker></defs>\n'
+        '<rect width="100%" height="100%" fill="white"/>\n'
+        f'<text x="{width / 2:.1f}" y="30" text-anchor="middle" font-size="18" '
+        f'font-weight="bold">{escape(f"Graph: {graph_id}")}</text>\n'
+    )
+
+    w('<g stroke="black" stroke-width="1.5" stroke-opacity="0.8">\n')
+    for u, v in graph.edges():
+        (x1, y1), (x2, y2) = xy[u], xy[v]
+        dx, dy = x2 - x1, y2 - y1
+        dist = (dx * dx + dy * dy) ** 0.5
+        if dist <= 2 * _SVG_NODE_RADIUS:
+            continue  # Self-loop or overlapping nodes: nothing visible to draw
+        # Trim to the circle boundaries so the arrowhead isn't hidden under the node
+        ox, oy = dx / dist * _SVG_NODE_RADIUS, dy / dist * _SVG_NODE_RADIUS
+        w(
+            f'<line x1="{x1 + ox:.1f}" y1="{y1 + oy:.1f}" x2="{x2 - ox:.1f}" y2="{y2 - oy:.1f}" '
+            'marker-end="url(#arrow)"/>\n'
+        )
+    w("</g>\n")
+
+    w('<g stroke="black" stroke-width="1.2">\n')
+    for n, color in zip(graph.nodes, node_colors):
+        x, y = xy[n]
+        w(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{_SVG_NODE_RADIUS}" fill="{color}"/>\n')
+    w("</g>\n")
 
+    if labels is not None:
+        w('<g text-anchor="middle" font-size="10" font-weight="bold">\n')
+        for n, text in labels.items():
+            x, y = xy[n]
+            lines = str(text).split("\n")
+            top = y - (len(lines) - 1) * 6 + 4
+            w(f'<text x="{x:.1f}" y="{top:.1f}">')
+            for i, line in enumerate(lines):
+                dy = "0" if i == 0 else "12"
+                w(f'<tspan x="{x:.1f}" dy="{dy}">{escape(line)}</tspan>')
+            w("</text>\n")
+        w("</g>\n")
+
+    edge_labels = _edge_labels(graph)
+    if edge_labels:
+        w('<g text-anchor="middle" font-size="9">\n')
+        for (u, v), text in edge_labels.items():
+            (x1, y1), (x2, y2) = xy[u], xy[v]
+            w(
+                f'<text x="{(x1 + x2) / 2:.1f}" y="{(y1 + y2) / 2:.1f}" fill="black" '
+                f'stroke="white" stroke-width="3" paint-order="stroke">{escape(text)}</text>\n'
+            )
+        w("</g>\n")
+
+    w("</svg>\n")
+    return buf.getvalue()
+
+
+def _graph_to_dict(graph: nx.DiGraph, graph_id: str) -> Dict[str, Any]:
+    """Serializable {graph_id, nodes, edges} dict shared by the exporters."""
     return {
         "graph_id": graph_id,
-        "format": "yaml",
-        "file_path": str(path),
-        "absolute_path": str(path.absolute()),
-        "file_size_bytes": path.stat().st_size,
+        "nodes": {n: {**d, "node_id": n} for n, d in graph.nodes(data=True)},
+        "edges": [{**a, "from": u, "to": v} for u, v, a in graph.edges(data=True)],
     }
 
 
-def export_graph_json(graph: nx.DiGraph, graph_id: str, output_path: str) -> Dict[str, Any]:
-    """Export graph to JSON file."""
-    import json
+def export_graph_yaml(graph: nx.DiGraph, graph_id: str, output_path: str) -> ExportResult:
+    """Export graph to YAML file."""
+    data = _graph_to_dict(graph, graph_id)
 
-    data = {
-        "graph_id": graph_id,
-        "nodes": {},
-        "edges": [],
-    }
-    for n in graph.nodes():
-        node_data = dict(graph.nodes[n])
-        node_data["node_id"] = n
-        data["nodes"][n] = node_data
-    for u, v, attrs in graph.edges(data=True):
-        edge_data = dict(attrs)
-        edge_data["from"] = u
-        edge_data["to"] = v
-        data["edges"].append(edge_data)
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Emit to a string first so the file gets a single write
+    payload = yaml.dump(data, Dumper=SafeDumper, sort_keys=False).encode()
+    path.write_bytes(payload)
+
+    return ExportResult(
+        graph_id=graph_id,
+        format="yaml",
+        file_path=str(path),
+        absolute_path=str(path.absolute()),
+        file_size_bytes=len(payload),
+    )
+
+
+def export_graph_json(graph: nx.DiGraph, graph_id: str, output_path: str) -> ExportResult:
+    """Export graph to JSON file."""
+    data = _graph_to_dict(graph, graph_id)
 
     path = Path(output_path)
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    payload = jsonio.dumps(data, indent=True)
+    path.write_bytes(payload)
 
-    return {
-        "graph_id": graph_id,
-        "format": "json",
-        "file_path": str(path),
-        "absolute_path": str(path.absolute()),
-        "file_size_bytes": path.stat().st_size,
-    }
+    return ExportResult(
+        graph_id=graph_id,
+        format="json",
+        file_path=str(path),
+        absolute_path=str(path.absolute()),
+        file_size_bytes=len(payload),
+    )
 
 
 def import_graph_yaml(path: str) -> Dict[str, Any]:
     with open(path, "r") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=SafeLoader)
 
 
 def import_graph_json(path: str) -> Dict[str, Any]:
-    import json
-
-    with open(path, "r") as f:
-        return json.load(f)
+    return jsonio.loads(Path(path).read_bytes())
 
@@ -0,0 +1,44 @@
+"""Tests for the Flask visualization app."""
+
+import io
+
+import pytest
+
+import app as web_app
+
+GRAPH_JSON = b'{"nodes": {"a": {"node_type": "action"}, "b": {"node_type": "success"}}, "edges": [{"from": "a", "to": "b"}]}'
+
+
+@pytest.fixture
+def client():
+    return web_app.app.test_client()
+
+
+def test_uploads_do_not_occupy_payload_cache(client) -> None:
+    before = web_app._serialize_graph.cache_info().currsize
+
+    for _ in range(3):
+        response = client.post(
+            "/api/load-file",
+            data={"file": (io.BytesIO(GRAPH_JSON), "up.json")},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 200
+        assert response.get_json()["stats"]["total_nodes"] == 2
+
+    assert web_app._serialize_graph.cache_info().currsize == before
+    assert not hasattr(web_app._graph_payload, "cache_info")
+
+
+def test_first_request_starts_cache_warm_up_once(client, monkeypatch: pytest.MonkeyPatch) -> None:
+    started = []
+    monkeypatch.setattr(web_app, "_warm_cache_started", False)
+    monkeypatch.setattr(web_app, "_warm_cache", lambda: started.append(True))
+
+    client.get("/api/graphs")
+    client.get("/api/graphs")
+
+    warmups = [t for t in web_app.threading.enumerate() if t.name == "graph-cache-warmup"]
+    for thread in warmups:
+        thread.join(timeout=5)
+    assert started == [True]
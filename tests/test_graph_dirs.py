@@ -0,0 +1,33 @@
+"""Tests for the shared graph directory lookup."""
+
+from pathlib import Path
+
+import pytest
+
+from networkx_graph.graph_dirs import default_graph_dirs
+
+
+def test_local_graphs_dir_comes_before_env_dir(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    shared = tmp_path / "shared"
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MCP_GRAPHS_DIR", str(shared))
+
+    assert default_graph_dirs() == ((tmp_path / "graphs").resolve(), shared.resolve())
+
+
+def test_env_dir_pointing_at_local_graphs_is_deduplicated(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MCP_GRAPHS_DIR", "graphs")
+
+    assert default_graph_dirs() == ((tmp_path / "graphs").resolve(),)
+
+
+def test_env_dir_unset(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("MCP_GRAPHS_DIR", raising=False)
+
+    assert default_graph_dirs() == ((tmp_path / "graphs").resolve(),)
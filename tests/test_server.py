@@ -0,0 +1,16 @@
+"""Tests for MCP server tool handlers."""
+
+from pathlib import Path
+
+from networkx_graph.server import GraphMCPServer
+
+
+def test_list_state_graphs_includes_dotfiles(tmp_path: Path) -> None:
+    for name in ["b.json", ".yaml", "a.yml", ".hidden.json", "a.yaml", "notes.txt"]:
+        (tmp_path / name).write_text("{}")
+
+    result = GraphMCPServer()._tool_list_state_graphs({"directory": str(tmp_path)})
+
+    assert result["available_files"] == [
+        str(tmp_path / name) for name in [".yaml", "a.yaml", "a.yml", ".hidden.json", "b.json"]
+    ]
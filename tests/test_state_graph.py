@@ -0,0 +1,128 @@
+"""Tests for StateGraph queries and its version-keyed result cache."""
+
+import threading
+
+import pytest
+
+from networkx_graph.state_graph import StateGraph
+
+
+@pytest.fixture
+def graph() -> StateGraph:
+    g = StateGraph("g")
+    g.add_node("a", "action", phase=1)
+    g.add_node("b", "decision")
+    g.add_node("c", "success")
+    g.add_edge("a", "b", order=1)
+    g.add_edge("b", "c", condition="yes")
+    return g
+
+
+def test_get_graph_info_result_is_not_shared(graph: StateGraph) -> None:
+    info = graph.get_graph_info()
+    info["node_types"]["action"] = 99
+    info["phases"].append(42)
+
+    fresh = graph.get_graph_info()
+    assert fresh["node_types"]["action"] == 1
+    assert fresh["phases"] == [1]
+
+
+def test_validate_graph_result_is_not_shared(graph: StateGraph) -> None:
+    graph.validate_graph()["warnings"].append("bogus")
+
+    assert "bogus" not in graph.validate_graph()["warnings"]
+
+
+def test_get_execution_sequence_accepts_keyword_arguments(graph: StateGraph) -> None:
+    positional = graph.get_execution_sequence("a", False)
+    keyword = graph.get_execution_sequence(from_node="a", until_decision=False)
+
+    assert [n["node_id"] for n in keyword] == ["a", "b", "c"]
+    assert keyword == positional
+
+
+@pytest.mark.parametrize(
+    ("args", "kwargs", "expected"),
+    [
+        (("a",), {}, ["a", "b"]),
+        ((), {"from_node": "a"}, ["a", "b"]),
+        (("a",), {"until_decision": False}, ["a", "b", "c"]),
+        (("a", True), {}, ["a", "b"]),
+    ],
+)
+def test_get_execution_sequence_call_shapes(
+    graph: StateGraph, args: tuple, kwargs: dict, expected: list
+) -> None:
+    sequence = graph.get_execution_sequence(*args, **kwargs)
+
+    assert [n["node_id"] for n in sequence] == expected
+
+
+def test_get_execution_sequence_result_is_not_shared(graph: StateGraph) -> None:
+    sequence = graph.get_execution_sequence("a")
+    sequence.pop()
+    sequence[0]["properties"]["touched"] = True
+
+    fresh = graph.get_execution_sequence(from_node="a")
+    assert [n["node_id"] for n in fresh] == ["a", "b"]
+    assert fresh[0]["properties"] == {}
+    assert graph.get_node("a")["properties"] == {}
+
+
+def test_toposort_result_is_not_shared(graph: StateGraph) -> None:
+    graph.toposort().reverse()
+
+    assert graph.toposort() == ["a", "b", "c"]
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        pytest.param(lambda g: g.add_node("a", "action"), id="add_node-duplicate"),
+        pytest.param(lambda g: g.add_node("z", "bogus"), id="add_node-bad-type"),
+        pytest.param(lambda g: g.add_nodes_bulk([{"node_id": "a", "node_type": "action"}]), id="add_nodes_bulk"),
+        pytest.param(lambda g: g.update_node("z", label="x"), id="update_node"),
+        pytest.param(lambda g: g.remove_node("z"), id="remove_node"),
+        pytest.param(lambda g: g.add_edge("a", "z"), id="add_edge"),
+        pytest.param(lambda g: g.add_edges_bulk([{"from": "z", "to": "a"}]), id="add_edges_bulk"),
+        pytest.param(lambda g: g.remove_edge("c", "a"), id="remove_edge"),
+        pytest.param(lambda g: g.set_edge_order("c", "a", 1), id="set_edge_order"),
+        pytest.param(lambda g: g.set_edge_condition("c", "a", "x"), id="set_edge_condition"),
+    ],
+)
+def test_rejected_mutation_keeps_cached_results(graph: StateGraph, mutate) -> None:
+    graph.get_graph_info()
+    version = graph._version
+
+    with pytest.raises(ValueError):
+        mutate(graph)
+
+    assert graph._version == version
+    assert graph._result_cache["get_graph_info"][0] == version
+
+
+def test_result_cache_holds_one_entry_per_method(graph: StateGraph) -> None:
+    for _ in range(3):
+        graph.get_graph_info()
+        graph.validate_graph()
+        graph.toposort()
+        graph.add_node(f"n{graph._version}", "action")
+
+    assert set(graph._result_cache) == {"get_graph_info", "validate_graph", "toposort"}
+
+
+@pytest.mark.parametrize("iterate", ["iter_nodes", "iter_edges"])
+def test_iterators_release_read_lock_between_items(graph: StateGraph, iterate: str) -> None:
+    records = getattr(graph, iterate)()
+    next(records)
+
+    # A suspended generator must not block writers (or, behind a waiting
+    # writer, the consuming loop's own reads)
+    writer = threading.Thread(target=graph.add_node, args=("w", "action"), daemon=True)
+    writer.start()
+    writer.join(timeout=5)
+    assert not writer.is_alive()
+
+    for _ in records:
+        graph.get_node("a")
@@ -0,0 +1,204 @@
+"""Consistency tests for StateGraph's incremental indices and query caches.
+
+Every check compares against a fresh NetworkX computation over ``g.graph``.
+"""
+
+import random
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+import networkx as nx
+import pytest
+
+from networkx_graph.state_graph import NODE_TYPES, StateGraph
+
+NODE_POOL = [f"n{i}" for i in range(12)]
+PHASES = [None, 1, 2, 3]
+
+
+def _expected_graph_info(g: StateGraph) -> Dict[str, Any]:
+    node_types = Counter(attrs.get("node_type", "unknown") for _, attrs in g.graph.nodes(data=True))
+    phases = {attrs["phase"] for _, attrs in g.graph.nodes(data=True) if "phase" in attrs}
+    return {
+        "graph_id": g.graph_id,
+        "num_nodes": g.graph.number_of_nodes(),
+        "num_edges": g.graph.number_of_edges(),
+        "node_types": dict(node_types),
+        "phases": sorted(phases),
+        "decision_points": node_types.get("decision", 0),
+        "loops": node_types.get("loop", 0),
+    }
+
+
+def _expected_warnings(g: StateGraph) -> List[str]:
+    warnings = []
+    isolated = sorted(nx.isolates(g.graph), key=str)
+    if isolated:
+        warnings.append(f"Graph has isolated nodes: {isolated}")
+    entries = sorted((n for n, d in g.graph.in_degree() if d == 0), key=str)
+    if len(entries) > 1:
+        warnings.append(f"Graph has multiple entry points: {entries}")
+    if not nx.is_directed_acyclic_graph(g.graph):
+        warnings.append("Graph contains cycle(s) (allowed in state-transition graphs)")
+    return warnings
+
+
+def _expected_sequence(g: StateGraph, start: str) -> List[str]:
+    sequence: List[str] = []
+    current = start
+    while current not in sequence:
+        sequence.append(current)
+        succ = g.graph.succ[current]
+        if not succ:
+            break
+        current = min(succ, key=lambda v: succ[v].get("order", 0))
+    return sequence
+
+
+def assert_consistent(g: StateGraph) -> None:
+    nodes = g.graph.nodes(data=True)
+
+    by_type: Dict[str, set] = {}
+    for node_id, attrs in nodes:
+        by_type.setdefault(attrs.get("node_type", "unknown"), set()).add(node_id)
+    assert dict(g._nodes_by_type) == by_type
+    assert +g._phase_counts == Counter(attrs["phase"] for _, attrs in nodes if "phase" in attrs)
+    assert g._isolated == set(nx.isolates(g.graph))
+    assert g._entries == {n for n, d in g.graph.in_degree() if d == 0}
+
+    assert g.get_graph_info() == _expected_graph_info(g)
+    assert g.validate_graph() == {"valid": True, "warnings": _expected_warnings(g)}
+
+    if nx.is_directed_acyclic_graph(g.graph):
+        order = g.toposort()
+        assert sorted(order) == sorted(g.graph)
+        position = {n: i for i, n in enumerate(order)}
+        assert all(position[u] < position[v] for u, v in g.graph.edges())
+    else:
+        with pytest.raises(ValueError):
+            g.toposort()
+
+    for start in list(g.graph)[:3]:
+        sequence = g.get_execution_sequence(start, until_decision=False)
+        assert [n["node_id"] for n in sequence] == _expected_sequence(g, start)
+
+    node_ids = list(g.graph)
+    for source in node_ids[:3]:
+        for target in node_ids[-3:]:
+            path = g.find_path(source, target)
+            if nx.has_path(g.graph, source, target):
+                assert len(path) == nx.shortest_path_length(g.graph, source, target) + 1
+                assert path[0] == source and path[-1] == target
+                assert all(g.graph.has_edge(u, v) for u, v in zip(path, path[1:]))
+            else:
+                assert path == []
+
+
+def _random_mutation(g: StateGraph, rng: random.Random) -> None:
+    present = list(g.graph)
+    absent = [n for n in NODE_POOL if n not in g.graph]
+    edges = list(g.graph.edges())
+    ops: List[Callable[[], Any]] = []
+
+    if absent:
+        ops.append(lambda: g.add_node(rng.choice(absent), rng.choice(NODE_TYPES), phase=rng.choice(PHASES)))
+        ops.append(
+            lambda: g.add_nodes_bulk(
+                [
+                    {"node_id": n, "node_type": rng.choice(NODE_TYPES), "phase": rng.choice(PHASES)}
+                    for n in rng.sample(absent, min(len(absent), 3))
+                ]
+            )
+        )
+    if present:
+        ops.append(lambda: g.remove_node(rng.choice(present)))
+        ops.append(lambda: g.update_node(rng.choice(present), phase=rng.choice(PHASES), label="x"))
+        ops.append(
+            lambda: g.add_edge(rng.choice(present), rng.choice(present), order=rng.randint(0, 3))
+        )
+        ops.append(
+            lambda: g.add_edges_bulk(
+                [{"from": rng.choice(present), "to": rng.choice(present), "order": rng.randint(0, 3)} for _ in range(3)]
+            )
+        )
+    if edges:
+        ops.append(lambda: g.remove_edge(*rng.choice(edges)))
+        ops.append(lambda: g.set_edge_order(*rng.choice(edges), rng.randint(0, 3)))
+        ops.append(lambda: g.set_edge_condition(*rng.choice(edges), rng.choice([None, "yes"])))
+
+    rng.choice(ops)()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_mutations_keep_indices_and_caches_consistent(seed: int) -> None:
+    rng = random.Random(seed)
+    g = StateGraph("g")
+    for _ in range(60):
+        _random_mutation(g, rng)
+        # Reads after every step also populate the caches the next mutation must invalidate
+        assert_consistent(g)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_from_dict_builds_consistent_indices(seed: int) -> None:
+    rng = random.Random(seed)
+    source = StateGraph("src")
+    for _ in range(40):
+        _random_mutation(source, rng)
+
+    data = {
+        "nodes": {n: {**attrs, "node_id": n} for n, attrs in source.graph.nodes(data=True)},
+        "edges": [{**attrs, "from": u, "to": v} for u, v, attrs in source.graph.edges(data=True)],
+    }
+    assert_consistent(StateGraph.from_dict("copy", data))
+
+
+@pytest.fixture
+def chain() -> StateGraph:
+    """a -> b -> {c, d}, with every cached reader already called once."""
+    g = StateGraph("g")
+    g.add_node("a", "action", phase=1)
+    g.add_node("b", "decision")
+    g.add_node("c", "success")
+    g.add_node("d", "failure")
+    g.add_edge("a", "b", order=1)
+    g.add_edge("b", "c", order=1)
+    g.add_edge("b", "d", order=2)
+    assert_consistent(g)
+    return g
+
+
+@pytest.mark.parametrize(
+    ("mutate", "changes_cached_answer"),
+    [
+        pytest.param(lambda g: g.add_node("e", "loop", phase=2), True, id="add_node"),
+        pytest.param(lambda g: g.add_nodes_bulk([{"node_id": "e", "node_type": "loop"}]), True, id="add_nodes_bulk"),
+        pytest.param(lambda g: g.update_node("b", phase=4), True, id="update_node"),
+        pytest.param(lambda g: g.remove_node("b"), True, id="remove_node"),
+        pytest.param(lambda g: g.add_edge("c", "a"), True, id="add_edge"),
+        pytest.param(lambda g: g.add_edges_bulk([{"from": "d", "to": "a"}]), True, id="add_edges_bulk"),
+        pytest.param(lambda g: g.remove_edge("a", "b"), True, id="remove_edge"),
+        pytest.param(lambda g: g.set_edge_order("b", "d", 0), True, id="set_edge_order"),
+        # Conditions aren't part of any cached answer; the version bump is what matters
+        pytest.param(lambda g: g.set_edge_condition("b", "c", "yes"), False, id="set_edge_condition"),
+    ],
+)
+def test_every_mutator_invalidates_cached_queries(
+    chain: StateGraph, mutate: Callable[[StateGraph], Any], changes_cached_answer: bool
+) -> None:
+    def cached_answers() -> tuple:
+        return (
+            chain.get_graph_info(),
+            chain.validate_graph(),
+            chain.get_execution_sequence("a", until_decision=False) if "a" in chain.graph else None,
+            chain.find_path("a", "d") if "a" in chain.graph and "d" in chain.graph else None,
+        )
+
+    version = chain._version
+    before = cached_answers()
+
+    mutate(chain)
+
+    assert chain._version > version
+    assert_consistent(chain)
+    assert (cached_answers() != before) == changes_cached_answer
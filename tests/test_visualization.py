@@ -0,0 +1,63 @@
+"""Tests for graph rendering."""
+
+from pathlib import Path
+
+import matplotlib
+import networkx as nx
+import pytest
+
+from networkx_graph.visualization import (
+    _RC_PARAMS,
+    RenderResult,
+    visualize_graph,
+    visualize_graphs_batch,
+)
+
+
+def test_render_leaves_global_rcparams_untouched(tmp_path: Path) -> None:
+    before = {key: matplotlib.rcParams[key] for key in _RC_PARAMS}
+    graph = nx.DiGraph()
+    graph.add_node("a", label="$5 budget", node_type="action")
+    graph.add_edge("a", "b", order=1)
+
+    result = visualize_graph(graph, "g", output_dir=str(tmp_path))
+
+    assert result.file_size_bytes == (tmp_path / "g.png").stat().st_size
+    assert {key: matplotlib.rcParams[key] for key in _RC_PARAMS} == before
+
+
+def _chain(n: int) -> nx.DiGraph:
+    graph = nx.DiGraph()
+    nx.add_path(graph, [f"n{i}" for i in range(n)])
+    nx.set_node_attributes(graph, "action", "node_type")
+    return graph
+
+
+def test_batch_renders_each_graph_in_worker_processes(tmp_path: Path) -> None:
+    graphs = [(_chain(3), "first"), (_chain(5), "second")]
+
+    results = visualize_graphs_batch(graphs, max_workers=2, output_dir=str(tmp_path))
+
+    assert [type(r) for r in results] == [RenderResult, RenderResult]
+    assert [(r.graph_id, r.num_nodes, r.num_edges) for r in results] == [("first", 3, 2), ("second", 5, 4)]
+    for result in results:
+        path = Path(result.file_path)
+        assert path.parent == tmp_path
+        assert path.read_bytes().startswith(b"\x89PNG")
+        assert path.stat().st_size == result.file_size_bytes
+
+
+@pytest.mark.parametrize(
+    ("graph_ids", "kwargs"),
+    [
+        pytest.param(["same", "same"], {}, id="duplicate-graph-id"),
+        pytest.param(["a", "b"], {"filename": "out.png"}, id="shared-filename"),
+    ],
+)
+def test_batch_rejects_colliding_output_paths(tmp_path: Path, graph_ids: list, kwargs: dict) -> None:
+    graphs = [(_chain(2), graph_id) for graph_id in graph_ids]
+
+    with pytest.raises(ValueError, match="would both be written"):
+        visualize_graphs_batch(graphs, output_dir=str(tmp_path), **kwargs)
+
+    assert list(tmp_path.iterdir()) == []